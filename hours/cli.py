@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Annotated, List
 
@@ -15,10 +16,17 @@ app = Typer(
     no_args_is_help=True,
 )
 
-if not APP_DIR.exists():
-    APP_DIR.mkdir(parents=True, exist_ok=True)
 
-controller = EntryController(DEFAULT_CONFIG.db_path)
+@lru_cache(maxsize=None)
+def get_controller() -> EntryController:
+    if not APP_DIR.exists():
+        APP_DIR.mkdir(parents=True, exist_ok=True)
+
+    try:
+        return EntryController(DEFAULT_CONFIG.db_path)
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1) from e
 
 
 @app.command(no_args_is_help=True, help="Log worked hours.")
@@ -44,13 +52,13 @@ def log(
     ] = False,
 ):
     if duplicate:
-        controller.duplicate_last_entry(client, project, task, date, hours)
+        get_controller().duplicate_last_entry(client, project, task, date, hours)
     else:
         if client is None or project is None or task is None or hours is None:
             typer.echo("You need to specify all the arguments if you are not duplicating the last entry.")
             raise typer.Exit(1)
         else:
-            controller.add_entry(client, project, task, date, hours)
+            get_controller().add_entry(client, project, task, date, hours)
 
 
 @app.command(no_args_is_help=True, help="Log worked hours.")
@@ -68,7 +76,7 @@ def update(
         typer.echo("You need to specify at least one argument to update.")
         raise typer.Exit(1)
 
-    controller.update_entry(entry_id, project, task, date, hours)
+    get_controller().update_entry(entry_id, project, task, date, hours)
 
 
 @app.command(help="List work log entries")
@@ -94,7 +102,7 @@ def report(
     ] = tomorrow().isoformat(),
     show_all: Annotated[bool, typer.Option("-a", "--all", help="Show all entries")] = False,
 ):
-    controller.display_entries(client, from_date, to_date, show_all)
+    get_controller().display_entries(client, from_date, to_date, show_all)
 
 
 @app.command(help="Create an XLS report of the work log entries", no_args_is_help=True)
@@ -127,12 +135,58 @@ def export(
         ),
     ] = first_day_of_month().isoformat(),
 ):
-    controller.export_entries(client, from_date, to_date, out_path)
+    get_controller().export_entries(client, from_date, to_date, out_path)
 
 
 @app.command(help="Remove a work log entries", no_args_is_help=True)
 def remove(ids: List[int] = typer.Argument(help="Entry ids to remove")):
-    controller.remove_entries(ids)
+    get_controller().remove_entries(ids)
+
+
+@app.command(help="Create a consistent snapshot of the work log database without blocking other commands")
+def backup(
+    out_path: Annotated[
+        Path,
+        typer.Option("-o", "--out", help="Output path, the default name contains the current date and time"),
+    ] = None,
+    compress: Annotated[bool, typer.Option("-z", "--compress", help="Compress the snapshot with gzip")] = False,
+    pages: Annotated[int, typer.Option("-p", "--pages", help="Number of database pages copied per step", min=1)] = 256,
+):
+    if out_path is None:
+        suffix = ".db.gz" if compress else ".db"
+        out_path = Path(f"hours-{datetime.now().strftime('%Y%m%d-%H%M%S')}{suffix}")
+    try:
+        get_controller().backup(out_path, compress, pages)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1) from e
+    typer.echo(f"Snapshot saved to {out_path}")
+
+
+@app.command(help="Restore a snapshot into the work log database", no_args_is_help=True)
+def restore(
+    snapshot: Annotated[
+        Path,
+        typer.Option(
+            "-i",
+            "--in",
+            help="Snapshot path, snapshots ending with .gz are decompressed",
+            exists=True,
+            dir_okay=False,
+        ),
+    ],
+    force: Annotated[bool, typer.Option("--force", help="Overwrite a database which already has data")] = False,
+):
+    if not force and not get_controller().is_empty():
+        typer.echo(f"The database at {DEFAULT_CONFIG.db_path} is not empty, use --force to overwrite it.")
+        raise typer.Exit(1)
+
+    try:
+        get_controller().restore(snapshot)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1) from e
+    typer.echo(f"Snapshot {snapshot} restored to {DEFAULT_CONFIG.db_path}")
 
 
 clients_app = Typer(no_args_is_help=True, help="Manage clients")
@@ -145,7 +199,7 @@ def add_client(
     rate: Annotated[float, typer.Option("-r", "--rate", help="Hourly rate")],
     currency: Annotated[str, typer.Option("-c", "--currency", help="Currency")],
 ):
-    controller.add_client(name, rate, currency)
+    get_controller().add_client(name, rate, currency)
 
 
 @clients_app.command(help="Update a client", no_args_is_help=True, name="update")
@@ -157,19 +211,19 @@ def update_client(
     if rate is None and currency is None:
         typer.echo("You need to specify at least one argument to update.")
         raise typer.Exit(1)
-    controller.update_client(name, rate, currency)
+    get_controller().update_client(name, rate, currency)
 
 
 @clients_app.command(help="Remove a client", no_args_is_help=True, name="remove")
 def remove_client(
     name: Annotated[str, typer.Option("-n", "--name", help="Client name")],
 ):
-    controller.remove_client(name)
+    get_controller().remove_client(name)
 
 
 @clients_app.command(help="List clients", name="list")
 def list_clients():
-    controller.display_clients()
+    get_controller().display_clients()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,14 @@
+import gzip
+import shutil
+import sqlite3
+import time
+from contextlib import closing
 from datetime import date, timedelta
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import List, Optional, Sequence
 
+from sqlalchemy import Engine, Integer, inspect, text
 from sqlmodel import Session, SQLModel, create_engine, select
 
 from hours.model import Client, Entry
@@ -22,10 +29,52 @@ class EntryController:
 
     def _create_model_if_not_exists(self):
         if self._db_path is not None and self._db_path.exists():
+            self._migrate_day_to_ordinal()
             return
 
         SQLModel.metadata.create_all(self._engine)
 
+    @staticmethod
+    def _day_is_ordinal(connection) -> bool:
+        columns = {c["name"]: c for c in inspect(connection).get_columns("entry")}
+        return isinstance(columns["day"]["type"], Integer)
+
+    def _migrate_day_to_ordinal(self, engine: Optional[Engine] = None):
+        """Converts databases created before days were stored as integer ordinals."""
+        with (engine or self._engine).connect() as connection:
+            if not inspect(connection).has_table("entry") or self._day_is_ordinal(connection):
+                return
+
+            # pysqlite only opens transactions before DML, so the schema changes need an explicit one to be atomic.
+            # It takes the write lock right away, and the layout is checked again in case another process has
+            # migrated the table in the meantime: date() would accept the ordinals as Julian day numbers.
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            if self._day_is_ordinal(connection):
+                return
+
+            invalid_ids = [
+                row[0] for row in connection.exec_driver_sql("SELECT id FROM entry WHERE date(day) IS NULL ORDER BY id")
+            ]
+            if invalid_ids:
+                raise ValueError(
+                    f"Cannot migrate the database: entries {', '.join(map(str, invalid_ids))} have an invalid day."
+                )
+
+            connection.exec_driver_sql("ALTER TABLE entry RENAME TO entry_legacy")
+            for index in inspect(connection).get_indexes("entry_legacy"):
+                connection.exec_driver_sql(f"DROP INDEX {index['name']}")
+            Entry.__table__.create(connection)
+            # julianday('0001-01-01') corresponds to ordinal 1
+            connection.execute(
+                text(
+                    "INSERT INTO entry (id, day, hours, project, task, client_id) "
+                    "SELECT id, CAST(julianday(date(day)) - julianday('0001-01-01') + 1 AS INTEGER), "
+                    "hours, project, task, client_id FROM entry_legacy"
+                )
+            )
+            connection.exec_driver_sql("DROP TABLE entry_legacy")
+            connection.commit()
+
     def get_entries(
         self,
         client_name: Optional[str] = None,
@@ -34,11 +83,11 @@ class EntryController:
     ) -> Sequence[Entry]:
         with Session(self._engine) as session:
             statement = select(Entry)
-            if from_date is not None:
-                # Workaround for SqlModel bug: it generates a wrong SQL query
-                from_date = from_date - timedelta(microseconds=1)
+            if from_date is not None and to_date is not None:
+                statement = statement.where(Entry.day.between(from_date, to_date - timedelta(days=1)))
+            elif from_date is not None:
                 statement = statement.where(Entry.day >= from_date)
-            if to_date is not None:
+            elif to_date is not None:
                 statement = statement.where(Entry.day < to_date)
             if client_name is not None:
                 client: Client = self.get_client_by_name(client_name)
@@ -186,6 +235,95 @@ class EntryController:
 
             session.commit()
 
+    def backup(self, out_path: Path, compress: bool = False, pages: int = 256, step_delay: float = 0.005) -> Path:
+        """Copies the database with SQLite's online backup API, `pages` pages at a time.
+
+        Locks are only held while a step runs and the copy sleeps `step_delay` seconds between steps, so concurrent
+        writers are not stalled. The snapshot is written and compressed in a temporary directory and only then moved
+        to `out_path`, so an interrupted backup never leaves a partial snapshot behind.
+        """
+        if pages < 1:
+            raise ValueError("At least one page has to be copied per backup step.")
+        if not out_path.parent.is_dir():
+            raise ValueError(f"The directory {out_path.parent} does not exist.")
+
+        with TemporaryDirectory(dir=out_path.parent) as tmp_dir:
+            snapshot_path = Path(tmp_dir) / "snapshot.db"
+            connection = self._engine.raw_connection()
+            try:
+                with closing(sqlite3.connect(snapshot_path)) as target:
+                    connection.driver_connection.backup(
+                        target, pages=pages, progress=lambda status, remaining, total: time.sleep(step_delay)
+                    )
+            finally:
+                connection.close()
+
+            if compress:
+                compressed_path = Path(tmp_dir) / "snapshot.db.gz"
+                with snapshot_path.open("rb") as src, gzip.open(compressed_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                snapshot_path = compressed_path
+
+            shutil.move(snapshot_path, out_path)
+
+        return out_path
+
+    def restore(self, snapshot_path: Path) -> None:
+        """Replaces the content of the database with a (possibly gzipped) snapshot created by `backup`.
+
+        The snapshot is validated and migrated in a temporary copy first, so the database is only overwritten by a
+        snapshot which can be used as is.
+        """
+        with TemporaryDirectory() as tmp_dir:
+            try:
+                with snapshot_path.open("rb") as snapshot:
+                    is_gzipped = snapshot.read(2) == b"\x1f\x8b"
+            except OSError as e:
+                raise ValueError(f"{snapshot_path} cannot be read.") from e
+
+            source_path = snapshot_path
+            if is_gzipped:
+                source_path = Path(tmp_dir) / "snapshot.db"
+                try:
+                    with gzip.open(snapshot_path, "rb") as src, source_path.open("wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                except (OSError, EOFError) as e:
+                    raise ValueError(f"{snapshot_path} is not a valid gzipped snapshot.") from e
+
+            restored_path = Path(tmp_dir) / "restored.db"
+            try:
+                with closing(sqlite3.connect(f"{source_path.resolve().as_uri()}?mode=ro", uri=True)) as source:
+                    with closing(sqlite3.connect(restored_path)) as restored:
+                        source.backup(restored)
+                        valid = restored.execute("PRAGMA quick_check").fetchone() == ("ok",)
+                        tables = {
+                            row[0] for row in restored.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                        }
+            except sqlite3.DatabaseError as e:
+                raise ValueError(f"{snapshot_path} is not a valid snapshot.") from e
+            if not valid or not {"client", "entry"} <= tables:
+                raise ValueError(f"{snapshot_path} is not a valid snapshot.")
+
+            restored_engine = create_engine(f"sqlite:///{restored_path}")
+            try:
+                self._migrate_day_to_ordinal(restored_engine)
+            finally:
+                restored_engine.dispose()
+
+            # The destination is locked for the whole copy anyway, so it is done in a single step
+            with closing(sqlite3.connect(restored_path)) as restored:
+                connection = self._engine.raw_connection()
+                try:
+                    restored.backup(connection.driver_connection)
+                finally:
+                    connection.close()
+
+    def is_empty(self) -> bool:
+        with Session(self._engine) as session:
+            has_clients = session.exec(select(Client.id).limit(1)).first() is not None
+            has_entries = session.exec(select(Entry.id).limit(1)).first() is not None
+            return not has_clients and not has_entries
+
     def display_clients(self):
         clients: List[Client] = list(self.get_clients())
         self._console_display.show_clients(clients)
@@ -1,12 +1,30 @@
 from datetime import date
 from typing import List, Optional
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import Integer, TypeDecorator
+from sqlmodel import Column, Field, Relationship, SQLModel
+
+
+class DayOrdinal(TypeDecorator):
+    """Stores a date as its proleptic Gregorian ordinal, so day comparisons are plain integer comparisons."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[date], dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return value.toordinal()
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[date]:
+        if value is None:
+            return None
+        return date.fromordinal(value)
 
 
 class Entry(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    day: date = Field(index=True, nullable=False)
+    day: date = Field(sa_column=Column(DayOrdinal, index=True, nullable=False))
     hours: float = Field(nullable=False)
     project: str = Field(index=True, nullable=False)
     task: Optional[str] = Field()
@@ -1,10 +1,62 @@
+from datetime import date
+from pathlib import Path
+
 import pytest
 from typer.testing import CliRunner
 
+from hours import cli
+from hours.controller import EntryController
+
 
 @pytest.fixture()
 def cli_runner() -> CliRunner:
     return CliRunner()
 
 
-# TODO: add tests for cli
+@pytest.fixture()
+def controller(monkeypatch: pytest.MonkeyPatch) -> EntryController:
+    controller = EntryController(None)
+    monkeypatch.setattr(cli, "get_controller", lambda: controller)
+    return controller
+
+
+@pytest.fixture()
+def snapshot_path(tmp_path: Path) -> Path:
+    source = EntryController(tmp_path / "logs.db")
+    client = source.add_client("snapshot_client", 100, "EUR")
+    source._add_entry(client, "project", "task", date.fromisoformat("2021-01-01"), 8.0)
+    return source.backup(tmp_path / "snapshot.db.gz", compress=True)
+
+
+def test_if_restore_refuses_to_overwrite_data(cli_runner: CliRunner, controller: EntryController, snapshot_path: Path):
+    controller.add_client("client", 100, "EUR")
+
+    result = cli_runner.invoke(cli.app, ["restore", "-i", str(snapshot_path)])
+
+    assert result.exit_code == 1
+    assert "use --force" in result.output
+    assert [c.name for c in controller.get_clients()] == ["client"]
+
+
+def test_if_restore_overwrites_data_with_force(cli_runner: CliRunner, controller: EntryController, snapshot_path: Path):
+    controller.add_client("client", 100, "EUR")
+
+    result = cli_runner.invoke(cli.app, ["restore", "-i", str(snapshot_path), "--force"])
+
+    assert result.exit_code == 0
+    assert "restored" in result.output
+    assert [c.name for c in controller.get_clients()] == ["snapshot_client"]
+    assert len(controller.get_entries()) == 1
+
+
+def test_if_restore_reports_invalid_snapshot(cli_runner: CliRunner, controller: EntryController, tmp_path: Path):
+    snapshot_path = tmp_path / "snapshot.db"
+    snapshot_path.write_text("not a database")
+
+    result = cli_runner.invoke(cli.app, ["restore", "-i", str(snapshot_path)])
+
+    assert result.exit_code == 1
+    assert "is not a valid snapshot" in result.output
+
+
+# TODO: add tests for other cli commands
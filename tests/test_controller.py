@@ -1,7 +1,11 @@
+import sqlite3
+from contextlib import closing
 from datetime import date
+from pathlib import Path
 from typing import List
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 
 from hours.controller import EntryController
 from hours.model import Entry
@@ -130,3 +134,244 @@ def test_if_can_duplicate_entry_with_override(controller: EntryController):
     assert last_entry.task == "task2"
     assert last_entry.day == first_entry.day
     assert last_entry.hours == first_entry.hours
+
+
+def test_if_get_entries_filters_half_open_range(controller: EntryController):
+    client = controller.add_client("client", 100, "EUR")
+    controller._add_entry(client, "project", "task1", date.fromisoformat("2020-12-31"), 8.0)
+    controller._add_entry(client, "project", "task2", date.fromisoformat("2021-01-01"), 8.0)
+    controller._add_entry(client, "project", "task3", date.fromisoformat("2021-01-31"), 8.0)
+    controller._add_entry(client, "project", "task4", date.fromisoformat("2021-02-01"), 8.0)
+
+    entries = controller.get_entries(from_date=date(2021, 1, 1), to_date=date(2021, 2, 1))
+    assert [e.task for e in entries] == ["task2", "task3"]
+
+    entries = controller.get_entries(from_date=date(2021, 1, 1))
+    assert [e.task for e in entries] == ["task2", "task3", "task4"]
+
+    entries = controller.get_entries(to_date=date(2021, 1, 1))
+    assert [e.task for e in entries] == ["task1"]
+
+
+def test_if_days_are_stored_as_ordinals(controller: EntryController):
+    client = controller.add_client("client", 100, "EUR")
+    controller._add_entry(client, "project", "task1", date.fromisoformat("2021-01-01"), 8.0)
+
+    with controller._engine.connect() as connection:
+        stored = connection.exec_driver_sql("SELECT day FROM entry").scalar_one()
+
+    assert stored == date(2021, 1, 1).toordinal()
+
+
+def _create_legacy_database(db_path: Path, entries: str, entry_constraints: bool = True):
+    not_null = "NOT NULL" if entry_constraints else ""
+    with closing(sqlite3.connect(db_path)) as connection:
+        connection.executescript(
+            f"""
+            CREATE TABLE client (
+                id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL, rate FLOAT NOT NULL, currency VARCHAR NOT NULL
+            );
+            CREATE UNIQUE INDEX ix_client_name ON client (name);
+            CREATE TABLE entry (
+                id INTEGER NOT NULL PRIMARY KEY, day DATE NOT NULL, hours FLOAT {not_null}, project VARCHAR NOT NULL,
+                task VARCHAR, client_id INTEGER NOT NULL, FOREIGN KEY(client_id) REFERENCES client (id)
+            );
+            CREATE INDEX ix_entry_day ON entry (day);
+            CREATE INDEX ix_entry_project ON entry (project);
+            INSERT INTO client VALUES (1, 'client', 100, 'EUR');
+            {entries}
+            """
+        )
+
+
+def _read_raw_entries(db_path: Path) -> List[tuple]:
+    with closing(sqlite3.connect(db_path)) as connection:
+        tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        assert sorted(tables) == ["client", "entry"]
+        return connection.execute("SELECT id, day, hours FROM entry ORDER BY id").fetchall()
+
+
+def test_if_legacy_database_is_migrated(tmp_path: Path):
+    db_path = tmp_path / "logs.db"
+    _create_legacy_database(
+        db_path,
+        """
+        INSERT INTO entry VALUES (1, '2021-01-01', 8.0, 'project', 'task1', 1);
+        INSERT INTO entry VALUES (2, '2021-02-01', 4.0, 'project', 'task2', 1);
+        """,
+    )
+
+    controller = EntryController(db_path)
+
+    entries = controller.get_entries("client", date(2021, 1, 1), date(2021, 2, 1))
+    assert len(entries) == 1
+    assert entries[0].id == 1
+    assert entries[0].day == date(2021, 1, 1)
+    assert [e.day for e in controller.get_entries()] == [date(2021, 1, 1), date(2021, 2, 1)]
+
+
+def test_if_migration_rejects_invalid_days(tmp_path: Path):
+    db_path = tmp_path / "logs.db"
+    _create_legacy_database(
+        db_path,
+        """
+        INSERT INTO entry VALUES (1, '2021-01-01', 8.0, 'project', 'task1', 1);
+        INSERT INTO entry VALUES (2, 'garbage', 4.0, 'project', 'task2', 1);
+        """,
+    )
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="entries 2 have an invalid day"):
+            EntryController(db_path)
+
+    assert _read_raw_entries(db_path) == [(1, "2021-01-01", 8.0), (2, "garbage", 4.0)]
+
+
+def test_if_failed_migration_keeps_original_rows(tmp_path: Path):
+    db_path = tmp_path / "logs.db"
+    _create_legacy_database(
+        db_path,
+        """
+        INSERT INTO entry VALUES (1, '2021-01-01', 8.0, 'project', 'task1', 1);
+        INSERT INTO entry VALUES (2, '2021-01-02', NULL, 'project', 'task2', 1);
+        """,
+        entry_constraints=False,
+    )
+
+    for _ in range(2):
+        with pytest.raises(IntegrityError):
+            EntryController(db_path)
+
+    assert _read_raw_entries(db_path) == [(1, "2021-01-01", 8.0), (2, "2021-01-02", None)]
+
+
+def test_if_concurrent_migration_is_not_repeated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    db_path = tmp_path / "logs.db"
+    _create_legacy_database(db_path, "INSERT INTO entry VALUES (1, '2021-01-01', 8.0, 'project', 'task1', 1);")
+    controller = EntryController(db_path)
+
+    # Another process checked the layout before this one migrated the table
+    checks = []
+
+    def stale_first_check(connection) -> bool:
+        checks.append(connection)
+        return len(checks) > 1 and EntryController._day_is_ordinal(connection)
+
+    monkeypatch.setattr(controller, "_day_is_ordinal", stale_first_check)
+    controller._migrate_day_to_ordinal()
+
+    assert len(checks) == 2
+    assert _read_raw_entries(db_path) == [(1, date(2021, 1, 1).toordinal(), 8.0)]
+    assert [e.day for e in controller.get_entries()] == [date(2021, 1, 1)]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_if_backup_can_be_restored(tmp_path: Path, compress: bool):
+    controller = EntryController(tmp_path / "logs.db")
+    client = controller.add_client("client", 100, "EUR")
+    controller._add_entry(client, "project", "task1", date.fromisoformat("2021-01-01"), 8.0)
+    controller._add_entry(client, "project", "task2", date.fromisoformat("2021-01-02"), 4.0)
+
+    snapshot_path = tmp_path / ("snapshot.db.gz" if compress else "snapshot.db")
+    controller.backup(snapshot_path, compress=compress, pages=1, step_delay=0)
+    assert sorted(tmp_path.iterdir()) == sorted([tmp_path / "logs.db", snapshot_path])
+    assert (snapshot_path.read_bytes()[:2] == b"\x1f\x8b") == compress
+
+    restored = EntryController(tmp_path / "restored.db")
+    restored.restore(snapshot_path)
+
+    assert [c.name for c in restored.get_clients()] == ["client"]
+    entries = restored.get_entries("client", date(2021, 1, 1), date(2021, 1, 2))
+    assert [(e.task, e.day, e.hours) for e in entries] == [("task1", date(2021, 1, 1), 8.0)]
+
+
+def test_if_backup_is_consistent_with_concurrent_writes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    db_path = tmp_path / "logs.db"
+    controller = EntryController(db_path)
+    client = controller.add_client("client", 100, "EUR")
+    for i in range(200):
+        controller._add_entry(client, "project" * 20, f"task{i}", date(2021, 1, 1), 1.0)
+
+    writes = []
+
+    def write_between_steps(_):
+        # Another connection logs hours while the backup is paused between two steps
+        if len(writes) < 5:
+            with closing(sqlite3.connect(db_path, timeout=0)) as writer:
+                writer.execute(
+                    "INSERT INTO entry (day, hours, project, task, client_id) VALUES (?, 2.0, 'project', 'task', 1)",
+                    (date(2021, 1, 2).toordinal(),),
+                )
+                writer.commit()
+            writes.append(1)
+
+    monkeypatch.setattr("hours.controller.time.sleep", write_between_steps)
+    snapshot_path = controller.backup(tmp_path / "snapshot.db", pages=1)
+
+    assert len(writes) == 5
+    with closing(sqlite3.connect(snapshot_path)) as snapshot:
+        assert snapshot.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        assert snapshot.execute("SELECT count(*), sum(hours) FROM entry").fetchone() == (205, 210.0)
+
+
+def test_if_backup_rejects_unbounded_steps(tmp_path: Path):
+    controller = EntryController(tmp_path / "logs.db")
+
+    with pytest.raises(ValueError):
+        controller.backup(tmp_path / "snapshot.db", pages=0)
+    assert not (tmp_path / "snapshot.db").exists()
+
+
+@pytest.mark.parametrize("content", [b"not a database", b"\x1f\x8bcorrupt"])
+@pytest.mark.parametrize("name", ["snapshot.db", "snapshot.db.gz"])
+def test_if_restore_rejects_invalid_snapshots(controller: EntryController, tmp_path: Path, name: str, content: bytes):
+    snapshot_path = tmp_path / name
+    snapshot_path.write_bytes(content * 100)
+
+    with pytest.raises(ValueError, match="is not a valid"):
+        controller.restore(snapshot_path)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_if_restore_detects_compression_from_content(tmp_path: Path, compress: bool):
+    source = EntryController(tmp_path / "logs.db")
+    source.add_client("client", 100, "EUR")
+    # The name suggests the opposite of the actual content
+    snapshot_path = source.backup(tmp_path / ("snapshot.db" if compress else "snapshot.db.gz"), compress=compress)
+
+    restored = EntryController(tmp_path / "restored.db")
+    restored.restore(snapshot_path)
+
+    assert [c.name for c in restored.get_clients()] == ["client"]
+
+
+def test_if_restore_keeps_data_when_snapshot_cannot_be_migrated(tmp_path: Path):
+    snapshot_path = tmp_path / "snapshot.db"
+    _create_legacy_database(snapshot_path, "INSERT INTO entry VALUES (1, 'garbage', 8.0, 'project', 'task1', 1);")
+    db_path = tmp_path / "logs.db"
+    controller = EntryController(db_path)
+    client = controller.add_client("client", 100, "EUR")
+    controller._add_entry(client, "project", "task1", date.fromisoformat("2021-01-01"), 8.0)
+
+    with pytest.raises(ValueError, match="entries 1 have an invalid day"):
+        controller.restore(snapshot_path)
+
+    assert _read_raw_entries(db_path) == [(1, date(2021, 1, 1).toordinal(), 8.0)]
+
+
+def test_if_restore_of_missing_snapshot_creates_no_file(controller: EntryController, tmp_path: Path):
+    with pytest.raises(ValueError, match="cannot be read"):
+        controller.restore(tmp_path / "missing.db")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_if_backup_rejects_missing_directory(controller: EntryController, tmp_path: Path):
+    with pytest.raises(ValueError, match="does not exist"):
+        controller.backup(tmp_path / "missing" / "snapshot.db")
+
+
+def test_if_is_empty_detects_data(controller: EntryController):
+    assert controller.is_empty()
+    controller.add_client("client", 100, "EUR")
+    assert not controller.is_empty()